@@ -0,0 +1,48 @@
+import logging
+import subprocess
+from pathlib import Path
+
+from .ffmpeg_paths import FFMPEG
+
+logger = logging.getLogger(__name__)
+
+# Speech recognition only needs 16 kHz mono; anything more is wasted bytes
+STT_SAMPLE_RATE = 16000
+
+
+def convert_audio(input_path: Path, output_path: Path, sample_rate: int = STT_SAMPLE_RATE) -> Path:
+    """
+    Decode input_path with ffmpeg and write 16-bit mono audio to output_path
+
+    ffmpeg streams frame by frame from file to file, so memory stays bounded
+    regardless of input length. The output container is chosen from the
+    output file suffix (e.g. .wav, .flac).
+
+    Args:
+        input_path: Source audio file in any format ffmpeg understands
+        output_path: Destination file
+        sample_rate: Output sample rate in Hz
+
+    Returns:
+        output_path
+    """
+    if not FFMPEG:
+        raise FileNotFoundError("ffmpeg not found in PATH")
+
+    command = [
+        FFMPEG, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", str(input_path),
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        # Google STT expects 16-bit samples; without this ffmpeg writes 24-bit
+        # FLAC for opus/mp3 input
+        "-sample_fmt", "s16",
+        str(output_path)
+    ]
+
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        error = result.stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to convert {input_path.name}: {error}")
+
+    return output_path
@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def audio_hasher():
+    """Return an incremental hasher producing the same keys as audio_cache_key"""
+    return hashlib.blake2b(digest_size=16)
+
+
+def audio_cache_key(content: bytes) -> str:
+    """Return a content hash suitable for keying cached transcriptions"""
+    hasher = audio_hasher()
+    hasher.update(content)
+    return hasher.hexdigest()
+
+
+def normalize_transcript(text: str) -> str:
+    """
+    Reduce a transcript to a canonical form so near-duplicate phrasings
+    (case, punctuation, spacing) share a cache entry
+    """
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache usage statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxSize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Global instances, shared by every pipeline that transcribes uploaded audio
+transcription_cache = LRUCache(settings.TRANSCRIPTION_CACHE_SIZE)
+language_cache = LRUCache(settings.LANGUAGE_CACHE_SIZE)
@@ -6,12 +6,32 @@ class Settings:
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "banking_voice_app")
     COLLECTION_NAME: str = os.getenv("COLLECTION_NAME", "voice_actions")
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000"))
     
     # Audio Configuration
     TEMP_AUDIO_DIR: str = os.getenv("TEMP_AUDIO_DIR", "temp_audio")
     MAX_AUDIO_FILE_SIZE: int = int(os.getenv("MAX_AUDIO_FILE_SIZE", "10485760"))  # 10MB
     AUDIO_FORMAT: str = "wav"
+    # Hand WAV/FLAC/AIFF uploads straight to the recognizer instead of re-encoding them to 16 kHz FLAC
+    SKIP_AUDIO_PREPROCESSING: bool = os.getenv("SKIP_AUDIO_PREPROCESSING", "False").lower() == "true"
+    # Calibrating for ambient noise discards the start of the clip and record() ignores the result
+    SKIP_AMBIENT_CALIBRATION: bool = os.getenv("SKIP_AMBIENT_CALIBRATION", "True").lower() == "true"
+    TRANSCRIPTION_CACHE_SIZE: int = int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "1024"))  # 0 disables caching
+    LANGUAGE_CACHE_SIZE: int = int(os.getenv("LANGUAGE_CACHE_SIZE", "4096"))  # 0 disables caching
+    # Voice messages processed at once; further requests wait up to AUDIO_QUEUE_TIMEOUT seconds, then get 503
+    MAX_CONCURRENT_AUDIO: int = int(os.getenv("MAX_CONCURRENT_AUDIO", "16"))
+    AUDIO_QUEUE_TIMEOUT: float = float(os.getenv("AUDIO_QUEUE_TIMEOUT", "5"))
     
+    # Speech Recognition Configuration
+    STT_BACKEND: str = os.getenv("STT_BACKEND", "google")  # "google" or "whisper"
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "small")
+    WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "auto")
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+    GOOGLE_SPEECH_API_KEY: Optional[str] = os.getenv("GOOGLE_SPEECH_API_KEY")
+    GOOGLE_SPEECH_TIMEOUT: int = int(os.getenv("GOOGLE_SPEECH_TIMEOUT", "30"))
+
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
@@ -1,20 +1,31 @@
+import asyncio
 import logging
-from typing import Optional, List
-from pymongo import MongoClient, ASCENDING
-from pymongo.collection import Collection
-from pymongo.database import Database
+import time
+from typing import Any, Dict, Optional, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
-from datetime import datetime
 
 from .config import settings
 from .models import VoiceActionInDB, VoiceActionCreate
 
 logger = logging.getLogger(__name__)
 
+# Inserts are coalesced into one insert_many per batch or per interval, whichever comes first
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_INTERVAL = 0.05  # seconds
+
+# A queued document and the future its producer awaits, or None if nobody waits
+PendingWrite = Tuple[dict, Optional[asyncio.Future]]
+
 
 class MongoDB:
-    client: Optional[MongoClient] = None
-    database: Optional[Database] = None
+    client: Optional[AsyncIOMotorClient] = None
+    database: Optional[AsyncIOMotorDatabase] = None
+    collection: Optional[AsyncIOMotorCollection] = None
+    write_queue: Optional["asyncio.Queue[Optional[PendingWrite]]"] = None
+    flush_task: Optional[asyncio.Task] = None
 
 
 db = MongoDB()
@@ -23,17 +34,26 @@ db = MongoDB()
 async def connect_to_mongo():
     """Create database connection"""
     try:
-        db.client = MongoClient(settings.MONGODB_URL)
+        db.client = AsyncIOMotorClient(
+            settings.MONGODB_URL,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS
+        )
         db.database = db.client[settings.DATABASE_NAME]
+        db.collection = db.database[settings.COLLECTION_NAME]
         
-        # Create indexes for better performance
-        collection = db.database[settings.COLLECTION_NAME]
-        collection.create_index([("userId", ASCENDING)])
-        collection.create_index([("timestamp", ASCENDING)])
+        # Per-user history is read newest first, so one compound index serves
+        # both the filter and the sort without an in-memory sort stage
+        await db.collection.create_index([("userId", ASCENDING), ("timestamp", DESCENDING)])
         
         # Test the connection
-        db.client.admin.command('ping')
+        await db.client.admin.command('ping')
         logger.info("Successfully connected to MongoDB")
+        
+        # Start batching writes
+        db.write_queue = asyncio.Queue()
+        db.flush_task = asyncio.create_task(_flush_worker(db.write_queue))
     except Exception as e:
         logger.error(f"Error connecting to MongoDB: {e}")
         raise
@@ -41,29 +61,120 @@ async def connect_to_mongo():
 
 async def close_mongo_connection():
     """Close database connection"""
+    if db.flush_task:
+        # Stop accepting queued writes first, so nothing can be enqueued behind
+        # the sentinel; writes from here on go directly to the collection
+        write_queue, flush_task = db.write_queue, db.flush_task
+        db.write_queue = None
+        db.flush_task = None
+        
+        # Let the worker write whatever is still queued before disconnecting
+        write_queue.put_nowait(None)
+        await flush_task
+    
     if db.client:
         db.client.close()
+        db.client = None
+        db.database = None
+        db.collection = None
         logger.info("Disconnected from MongoDB")
 
 
-def get_collection() -> Collection:
+def get_collection() -> AsyncIOMotorCollection:
     """Get the voice actions collection"""
-    if db.database is None:
+    if db.collection is None:
         raise Exception("Database not initialized")
-    return db.database[settings.COLLECTION_NAME]
+    return db.collection
 
 
-async def create_voice_action(voice_action: VoiceActionCreate) -> VoiceActionInDB:
-    """Create a new voice action record"""
-    collection = get_collection()
+async def _flush_worker(queue: "asyncio.Queue[Optional[PendingWrite]]") -> None:
+    """Drain queued inserts in batches until a None sentinel arrives"""
+    loop = asyncio.get_running_loop()
+    stopping = False
     
+    while not stopping:
+        item = await queue.get()
+        if item is None:
+            return
+        
+        batch = [item]
+        deadline = loop.time() + WRITE_BATCH_INTERVAL
+        while len(batch) < WRITE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+        
+        await _insert_batch(batch)
+
+
+async def _insert_batch(batch: List[PendingWrite]) -> None:
+    """Write a batch with one insert_many and resolve each producer's future"""
+    docs = [doc for doc, _ in batch]
+    failed = {}
+    
+    try:
+        await get_collection().insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed[write_error["index"]] = Exception(write_error.get("errmsg", "Insert failed"))
+    except Exception as e:
+        logger.error(f"Error writing batch of {len(batch)} voice actions: {e}")
+        failed = {index: e for index in range(len(batch))}
+    
+    for index, (doc, future) in enumerate(batch):
+        if future is None:
+            if index in failed:
+                logger.error(f"Error writing voice action {doc['_id']}: {failed[index]}")
+            continue
+        if future.done():
+            continue
+        if index in failed:
+            future.set_exception(failed[index])
+        else:
+            future.set_result(None)
+
+
+async def create_voice_action(voice_action: VoiceActionCreate, wait_for_write: bool = True) -> VoiceActionInDB:
+    """
+    Create a new voice action record
+
+    Args:
+        voice_action: Validated record to store
+        wait_for_write: If False and writes are being batched, return as soon
+            as the record is queued instead of after it has been written
+
+    Returns:
+        The stored record, including its id
+    """
     voice_action_dict = voice_action.model_dump()
-    voice_action_dict["timestamp"] = datetime.utcnow()
+    voice_action_dict["timestamp"] = time.time_ns()
+    # The id is allocated here rather than by the server, so the record is
+    # complete before the write lands
+    voice_action_dict["_id"] = ObjectId()
+    voice_action_in_db = VoiceActionInDB.model_construct(**{**voice_action_dict, "_id": str(voice_action_dict["_id"])})
     
-    result = collection.insert_one(voice_action_dict)
+    # Enqueue without awaiting between the check and the put, so shutdown
+    # cannot slip its sentinel in ahead of this item
+    write_queue = db.write_queue
+    if write_queue is not None:
+        future = None if not wait_for_write else asyncio.get_running_loop().create_future()
+        write_queue.put_nowait((voice_action_dict, future))
+        if future is not None:
+            await future
+        return voice_action_in_db
     
-    created_record = collection.find_one({"_id": result.inserted_id})
-    return VoiceActionInDB(**created_record)
+    # No batching worker running (or shutdown has started), write directly
+    collection = get_collection()
+    await collection.insert_one(voice_action_dict)
+    return voice_action_in_db
 
 
 async def get_voice_action_by_id(action_id: str) -> Optional[VoiceActionInDB]:
@@ -71,22 +182,52 @@ async def get_voice_action_by_id(action_id: str) -> Optional[VoiceActionInDB]:
     collection = get_collection()
     
     try:
-        record = collection.find_one({"_id": ObjectId(action_id)})
+        record = await collection.find_one({"_id": ObjectId(action_id)})
         if record:
-            return VoiceActionInDB(**record)
+            record["_id"] = str(record["_id"])
+            return VoiceActionInDB.model_construct(**record)
     except Exception as e:
         logger.error(f"Error fetching voice action: {e}")
     
     return None
 
 
-async def get_voice_actions_by_user(user_id: str, limit: int = 100) -> List[VoiceActionInDB]:
-    """Get all voice actions for a specific user"""
+async def get_voice_actions_by_user(user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Get all voice actions for a specific user
+
+    Returns plain dicts that validate as VoiceActionResponse, without
+    building a model per row here. Timestamps stay in epoch nanoseconds; use
+    VoiceActionResponse as the route's response model so its serializer
+    renders them as ISO-8601.
+    """
     collection = get_collection()
     
-    cursor = collection.find({"userId": user_id}).sort("timestamp", -1).limit(limit)
+    # Fetch only the response fields and have the server stringify _id, so
+    # documents arrive ready to serialize
+    pipeline = [
+        {"$match": {"userId": user_id}},
+        {"$sort": {"timestamp": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$_id"},
+            "userId": 1,
+            "audioTranscript": 1,
+            "audioFileName": 1,
+            "processed": 1,
+            # Stored as epoch nanoseconds. Rows not yet converted by
+            # migrate-timestamps.js still hold a date; convert those
+            # (milliseconds) so every row has one representation
+            "timestamp": {"$cond": [
+                {"$eq": [{"$type": "$timestamp"}, "date"]},
+                {"$multiply": [{"$toLong": "$timestamp"}, 1000000]},
+                "$timestamp"
+            ]}
+        }}
+    ]
     
-    return [VoiceActionInDB(**record) for record in cursor]
+    return await collection.aggregate(pipeline).to_list(limit)
 
 
 async def update_voice_action_processed(action_id: str, processed: bool = True) -> bool:
@@ -94,7 +235,7 @@ async def update_voice_action_processed(action_id: str, processed: bool = True)
     collection = get_collection()
     
     try:
-        result = collection.update_one(
+        result = await collection.update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"processed": processed}}
         )
@@ -0,0 +1,5 @@
+from shutil import which
+
+# Resolved once per process; every lookup is a linear scan of PATH
+FFMPEG = which("ffmpeg")
+FLAC = which("flac")
@@ -1,28 +1,18 @@
+import asyncio
 import logging
-import tempfile
-from pathlib import Path
+import os
 from typing import Optional
-import speech_recognition as sr
-from pydub import AudioSegment
-from pydub.utils import which
-from langdetect import detect, LangDetectException
 
-from .config import settings
+from .cache import language_cache, normalize_transcript
+from .text_language import detect_language_code
+from .transcription import transcription_service
+from .workers import run_in_process
 
 logger = logging.getLogger(__name__)
 
-# Set up pydub to use ffmpeg if available
-AudioSegment.converter = which("ffmpeg")
-AudioSegment.ffmpeg = which("ffmpeg")
-AudioSegment.ffprobe = which("ffprobe")
-
 
 class LanguageDetector:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.temp_dir = Path(settings.TEMP_AUDIO_DIR)
-        self.temp_dir.mkdir(exist_ok=True)
-
         # Language code mapping
         self.language_mapping = {
             'en': 'English',
@@ -47,6 +37,20 @@ class LanguageDetector:
             'he': 'Hebrew'
         }
 
+    async def warmup(self) -> None:
+        """
+        Spawn the process pool ahead of traffic
+
+        Workers load langdetect's profiles in the pool initializer as they
+        start. Submitting one job per core spawns most workers now, but a
+        fast worker may take several jobs, so some may still start on first use.
+        """
+        await asyncio.gather(*(
+            run_in_process(detect_language_code, "warming up the language detector")
+            for _ in range(os.cpu_count() or 1)
+        ))
+        logger.info("Language detector warmed up")
+
     async def detect_language_from_audio(self, audio_content: bytes, filename: str) -> str:
         """
         Detect language from audio content by transcribing and analyzing text
@@ -58,37 +62,38 @@ class LanguageDetector:
         Returns:
             Detected language (full name, e.g., "English", "Spanish")
         """
-        temp_file_path = None
-        processed_file_path = None
-
         try:
-            # Save uploaded file temporarily
-            temp_file_path = self._save_temp_file(audio_content, filename)
+            result = await transcription_service.transcribe(audio_content, filename)
+            return await self.detect_language(result.text, result.language)
 
-            # Convert to WAV if needed
-            processed_file_path = await self._convert_to_wav(temp_file_path)
-
-            # Transcribe audio to get text
-            transcription = await self._transcribe_audio(processed_file_path)
+        except Exception as e:
+            logger.error(f"Error detecting language from audio: {e}")
+            return "English"  # Default fallback
 
-            if not transcription or transcription.strip() == "":
-                logger.warning("No transcription available for language detection")
-                return "English"  # Default fallback
+    async def detect_language(self, transcription: str, language_code: Optional[str] = None) -> str:
+        """
+        Detect language from an already transcribed voice message
 
-            # Detect language from transcribed text
-            language = await self._detect_language_from_text(transcription)
+        Args:
+            transcription: Text produced by the transcription service
+            language_code: Language already identified by the STT backend, if any
 
-            logger.info(f"Detected language: {language} from text: '{transcription[:50]}...'")
-            return language
+        Returns:
+            Detected language (full name, e.g., "English", "Spanish")
+        """
+        if language_code:
+            # The backend heard the language directly; no need to guess from text
+            return self.language_mapping.get(language_code, "English")
 
-        except Exception as e:
-            logger.error(f"Error detecting language from audio: {e}")
+        if not transcription or transcription.strip() == "":
+            logger.warning("No transcription available for language detection")
             return "English"  # Default fallback
-        finally:
-            # Clean up temporary files
-            self._cleanup_file(temp_file_path)
-            if processed_file_path and processed_file_path != temp_file_path:
-                self._cleanup_file(processed_file_path)
+
+        # Detect language from transcribed text
+        language = await self._detect_language_from_text(transcription)
+
+        logger.info(f"Detected language: {language} from text: '{transcription[:50]}...'")
+        return language
 
     async def _detect_language_from_text(self, text: str) -> str:
         """
@@ -109,94 +114,32 @@ class LanguageDetector:
             if len(cleaned_text) < 3:
                 return "English"
 
-            # Use langdetect to identify language
-            detected_code = detect(cleaned_text)
+            # Transcripts that only differ in case or punctuation reuse the earlier result
+            normalized_text = normalize_transcript(cleaned_text)
+            cached_language = language_cache.get(normalized_text)
+            if cached_language is not None:
+                return cached_language
+
+            # langdetect is pure-Python n-gram scoring, so it runs on the
+            # process pool instead of holding the event loop and the GIL
+            detected_code = await run_in_process(detect_language_code, cleaned_text)
+            if detected_code is None:
+                # e.g. digits only; the same text will fail again, so cache the default
+                logger.warning(f"Language detection failed for '{cleaned_text[:50]}'. Using English as default.")
+                language_cache.put(normalized_text, "English")
+                return "English"
 
             # Convert language code to full name
             language_name = self.language_mapping.get(detected_code, "English")
 
             logger.info(f"Language detection: '{detected_code}' -> '{language_name}'")
+            language_cache.put(normalized_text, language_name)
             return language_name
 
-        except LangDetectException as e:
-            logger.warning(f"Language detection failed: {e}. Using English as default.")
-            return "English"
         except Exception as e:
             logger.error(f"Unexpected error in language detection: {e}. Using English as default.")
             return "English"
 
-    def _save_temp_file(self, content: bytes, filename: str) -> Path:
-        """Save uploaded content to temporary file"""
-        suffix = Path(filename).suffix or '.tmp'
-
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            dir=self.temp_dir,
-            suffix=suffix
-        ) as temp_file:
-            temp_file.write(content)
-            return Path(temp_file.name)
-
-    async def _convert_to_wav(self, input_path: Path) -> Path:
-        """Convert audio file to WAV format"""
-        try:
-            # If already WAV, return as is
-            if input_path.suffix.lower() == '.wav':
-                return input_path
-
-            # Load and convert to WAV
-            audio = AudioSegment.from_file(str(input_path))
-
-            # Create output path
-            output_path = input_path.with_suffix('.wav')
-
-            # Export as WAV
-            audio.export(str(output_path), format="wav")
-
-            logger.debug(f"Converted {input_path.name} to {output_path.name}")
-            return output_path
-
-        except Exception as e:
-            logger.error(f"Error converting audio file: {e}")
-            # If conversion fails, try to proceed with original file
-            return input_path
-
-    async def _transcribe_audio(self, audio_path: Path) -> str:
-        """Transcribe audio file to text for language detection"""
-        try:
-            # Try to load the audio file
-            with sr.AudioFile(str(audio_path)) as source:
-                # Adjust for ambient noise briefly
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
-
-                # Record the audio
-                audio = self.recognizer.record(source)
-
-                # Transcribe using Google Speech Recognition
-                text = self.recognizer.recognize_google(audio)
-
-                logger.debug(f"Transcribed for language detection: {text[:100]}...")
-                return text
-
-        except sr.UnknownValueError:
-            logger.warning("Speech recognition could not understand audio for language detection")
-            return ""
-        except sr.RequestError as e:
-            logger.error(f"Speech recognition service error for language detection: {e}")
-            return ""
-        except Exception as e:
-            logger.error(f"Unexpected error during transcription for language detection: {e}")
-            return ""
-
-    def _cleanup_file(self, file_path: Optional[Path]) -> None:
-        """Remove temporary file"""
-        if file_path and file_path.exists():
-            try:
-                file_path.unlink()
-                logger.debug(f"Cleaned up file: {file_path}")
-            except Exception as e:
-                logger.warning(f"Could not remove file {file_path}: {e}")
-
 
 # Global instance
 language_detector = LanguageDetector()
\ No newline at end of file
@@ -1,17 +1,25 @@
+import asyncio
+import hashlib
 import logging
-import uuid
-from typing import Optional
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
 from .config import settings
 from .models import N8NProcessingResult
 from .language_detector import language_detector
+from .transcription import transcription_service
 from .n8n_service import n8n_service
+from .cache import audio_hasher, language_cache, transcription_cache
+from .middleware import BodySizeLimitMiddleware, OriginOnlyCORSMiddleware, StaticResponseMiddleware
+from .pools import upload_buffers
+from .workers import run_blocking, shutdown_workers, start_workers
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +29,59 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Bytes allowed on top of MAX_AUDIO_FILE_SIZE for multipart framing and form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Caps how many voice messages are copied, transcoded and forwarded at once.
+# FastAPI has already received and spooled the multipart body before the
+# handler runs, so this does not limit upload memory or bandwidth; that early
+# guard is BodySizeLimitMiddleware.
+_audio_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_AUDIO)
+
+HEALTH_STATUS = {"status": "healthy", "message": "Banking Voice Action API is running"}
+
+# Seconds between sweeps of stale files in TEMP_AUDIO_DIR
+TEMP_CLEANUP_INTERVAL = 3600
+
+# The frontend page is immutable per deployment, so it is read once at import
+try:
+    INDEX_HTML: Optional[bytes] = Path("static/index.html").read_bytes()
+    INDEX_HEADERS = {
+        "Cache-Control": "public, max-age=300",
+        "ETag": f'"{hashlib.blake2b(INDEX_HTML, digest_size=16).hexdigest()}"'
+    }
+except FileNotFoundError:
+    INDEX_HTML = None
+    INDEX_HEADERS = {}
+
+
+async def _cleanup_temp_files_periodically() -> None:
+    """Sweep stale temporary audio files left behind by interrupted requests"""
+    while True:
+        try:
+            await transcription_service.cleanup_old_files()
+        except Exception as e:
+            logger.error(f"Temporary file cleanup failed: {e}")
+        await asyncio.sleep(TEMP_CLEANUP_INTERVAL)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup; everything torn down below is (re)created here, so the
+    # lifespan can run more than once in a process
+    start_workers()
+    n8n_service.open()
+    transcription_service.open()
+    await run_blocking(transcription_service.warmup)
+    await language_detector.warmup()
+    cleanup_task = asyncio.create_task(_cleanup_temp_files_periodically())
     logger.info("Application started")
     yield
     # Shutdown
+    cleanup_task.cancel()
+    await n8n_service.aclose()
+    transcription_service.close()
+    shutdown_workers()
     logger.info("Application shutdown")
 
 
@@ -35,29 +89,101 @@ app = FastAPI(
     title="Banking Voice Action API",
     description="API for processing banking voice actions",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
 app.add_middleware(
-    CORSMiddleware,
+    OriginOnlyCORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads from their headers, before the body is spooled.
+# The allowance covers the multipart boundaries and form fields around the file.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_AUDIO_FILE_SIZE + MULTIPART_OVERHEAD,
+    detail=f"File too large. Maximum size is {settings.MAX_AUDIO_FILE_SIZE} bytes"
+)
+
+# Health probes are answered from a prebuilt response before any other
+# middleware runs; added last, so it is the outermost layer
+app.add_middleware(StaticResponseMiddleware, path="/health", response=ORJSONResponse(HEALTH_STATUS))
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+def _copy_chunk(source, destination, buf: bytearray) -> memoryview:
+    """Read the next chunk of source into buf and append it to destination"""
+    count = source.readinto(buf)
+    chunk = memoryview(buf)[:count]
+    destination.write(chunk)
+    return chunk
+
+
+async def _save_upload(upload: UploadFile) -> Tuple[Path, str]:
+    """
+    Stream an upload to a temporary file, enforcing MAX_AUDIO_FILE_SIZE as it goes
+
+    Returns:
+        Tuple of (temp_file_path, content_hash)
+    """
+    suffix = Path(upload.filename).suffix or '.tmp'
+    hasher = audio_hasher()
+    total_size = 0
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, dir=settings.TEMP_AUDIO_DIR, suffix=suffix)
+    temp_path = Path(temp_file.name)
+    try:
+        with temp_file, upload_buffers.buffer() as buf:
+            # Read straight into a pooled buffer rather than allocating a new
+            # bytes object per chunk
+            while chunk := await run_blocking(_copy_chunk, upload.file, temp_file, buf):
+                total_size += len(chunk)
+                if total_size > settings.MAX_AUDIO_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {settings.MAX_AUDIO_FILE_SIZE} bytes"
+                    )
+                hasher.update(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return temp_path, hasher.hexdigest()
+
+
+def _uuid4_str() -> str:
+    """Return a random (version 4) UUID string without building a uuid.UUID object"""
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header, which may list several tags, against etag"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
+async def read_root(request: Request):
     """Serve the main application page"""
-    try:
-        with open("static/index.html", "r") as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-    except FileNotFoundError:
+    if INDEX_HTML is not None:
+        # Browsers revalidating an unchanged page get an empty 304
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, INDEX_HEADERS["ETag"]):
+            return Response(status_code=304, headers=INDEX_HEADERS)
+        return HTMLResponse(content=INDEX_HTML, status_code=200, headers=INDEX_HEADERS)
+    else:
         return HTMLResponse(
             content="<h1>Banking Voice Action App</h1><p>Frontend not found. Please check static files.</p>",
             status_code=404
@@ -66,8 +192,17 @@ async def read_root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "message": "Banking Voice Action API is running"}
+    """Health check endpoint (normally answered by StaticResponseMiddleware)"""
+    return HEALTH_STATUS
+
+
+@app.get("/metrics")
+async def metrics():
+    """Cache statistics for the transcription pipeline"""
+    return {
+        "transcriptionCache": transcription_cache.stats(),
+        "languageCache": language_cache.stats()
+    }
 
 
 @app.post("/api/process-voice")
@@ -78,53 +213,65 @@ async def process_voice_message(
     """
     Process voice message with language detection and send to N8N webhook
     """
+    upload_path = None
+
+    # Shed processing load rather than queueing work without bound (the
+    # upload itself has already been spooled by the time we get here)
+    try:
+        await asyncio.wait_for(_audio_slots.acquire(), settings.AUDIO_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy processing other voice messages. Please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
     try:
         # Generate user ID if not provided
         if not userId:
-            userId = str(uuid.uuid4())
+            userId = _uuid4_str()
 
         # Validate file
         if not audio.filename:
             raise HTTPException(status_code=400, detail="No audio file provided")
 
-        # Check file size
-        content = await audio.read()
-        if len(content) > settings.MAX_AUDIO_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size is {settings.MAX_AUDIO_FILE_SIZE} bytes"
-            )
+        # Copy to disk, checking file size as the upload streams in
+        upload_path, cache_key = await _save_upload(audio)
 
         logger.info(f"Processing voice message for user: {userId}")
 
-        # Detect language from audio
-        detected_language = await language_detector.detect_language_from_audio(content, audio.filename)
+        # Transcribe once, then detect language from the text
+        transcription = await transcription_service.transcribe_path(upload_path, cache_key)
+        detected_language = await language_detector.detect_language(transcription.text, transcription.language)
 
         # Send language and MP3 data to N8N webhook
-        n8n_result = await n8n_service.process_voice_with_language(
-            user_id=userId,
-            language=detected_language,
-            voice_record=content,
-            filename=audio.filename
-        )
+        with open(upload_path, "rb") as voice_record:
+            n8n_result = await n8n_service.process_voice_with_language(
+                user_id=userId,
+                language=detected_language,
+                voice_record=voice_record,
+                filename=audio.filename
+            )
 
-        # Return response with N8N result
-        return {
+        # Return response with N8N result. Handing back a Response skips
+        # FastAPI's jsonable_encoder pass over the nested n8n payload.
+        return ORJSONResponse({
             "success": True,
             "userId": userId,
             "detectedLanguage": detected_language,
             "filename": audio.filename,
-            "n8nResult": {
-                "success": n8n_result.success,
-                "result": n8n_result.result,
-                "error": n8n_result.error,
-                "processingTime": n8n_result.processingTime
-            }
-        }
+            "n8nResult": n8n_result.model_dump()
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing voice message: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing voice message: {str(e)}")
+    finally:
+        _audio_slots.release()
+        if upload_path:
+            await run_blocking(upload_path.unlink, missing_ok=True)
 
 
 @app.post("/api/generate-session")
@@ -132,7 +279,7 @@ async def generate_session():
     """
     Generate a new session ID for a user
     """
-    return {"userId": str(uuid.uuid4())}
+    return {"userId": _uuid4_str()}
 
 
 if __name__ == "__main__":
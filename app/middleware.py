@@ -0,0 +1,129 @@
+import logging
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_body_size
+
+    FastAPI spools the whole multipart body before a route handler runs, so
+    the limit has to be enforced at the ASGI layer. A declared Content-Length
+    over the limit is answered with 413 before any of the body is received.
+    Bodies without one (chunked uploads) are counted as they arrive and cut
+    off with 413 as soon as they pass the limit.
+    """
+
+    def __init__(self, app, max_body_size: int, detail: Optional[str] = None):
+        """
+        Args:
+            app: ASGI app to wrap
+            max_body_size: Largest accepted request body in bytes
+            detail: Error message for rejected requests; pass the limit users
+                know about when max_body_size includes framing overhead
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+        self.detail = detail or f"Request body too large. Maximum size is {max_body_size} bytes"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    logger.warning(f"Rejected request to {scope['path']} with Content-Length {int(value)}")
+                    await self._too_large()(scope, receive, send)
+                    return
+                # The server never delivers more than the declared length
+                await self.app(scope, receive, send)
+                return
+
+        await self._call_counting_body(scope, receive, send)
+
+    async def _call_counting_body(self, scope, receive, send):
+        """Run the app with a receive that fails once the body passes the limit"""
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    logger.warning(f"Rejected streamed request to {scope['path']} after {received} bytes")
+                    # FastAPI re-raises HTTPException from body parsing, so its
+                    # exception handler answers 413 without reading any further
+                    raise HTTPException(
+                        status_code=413,
+                        detail=self.detail,
+                        headers={"Connection": "close"}
+                    )
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            # Apps without an HTTPException handler let it reach us
+            if e.status_code != 413 or response_started:
+                raise
+            await self._too_large()(scope, receive, send)
+
+    def _too_large(self) -> ORJSONResponse:
+        return ORJSONResponse(
+            {"detail": self.detail},
+            status_code=413,
+            headers={"Connection": "close"}
+        )
+
+
+class StaticResponseMiddleware:
+    """
+    Answer GET requests for one path with a prebuilt response
+
+    Meant to be the outermost middleware, so frequent probes such as /health
+    skip the rest of the middleware stack, routing and serialization. The
+    response object is built once and replayed for every request.
+    """
+
+    def __init__(self, app, path: str, response):
+        self.app = app
+        self.path = path
+        self.response = response
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == self.path and scope["method"] == "GET":
+            await self.response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class OriginOnlyCORSMiddleware(CORSMiddleware):
+    """
+    CORSMiddleware that passes requests without an Origin header straight through
+
+    Same-origin page loads, static assets and probes never carry Origin, and
+    CORSMiddleware would only parse their headers to find that out.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not any(name == b"origin" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        await super().__call__(scope, receive, send)
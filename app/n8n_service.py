@@ -1,18 +1,108 @@
 import httpx
+import orjson
+import os
+import re
+import secrets
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, BinaryIO, Tuple, Union
 
 from .config import settings
 from .models import N8NProcessingResult
+from .workers import run_blocking
 
 logger = logging.getLogger(__name__)
 
+# Audio files are forwarded to n8n in chunks of this size
+MULTIPART_CHUNK_SIZE = 64 * 1024
+
+# Escaping for names inside quoted multipart headers, as httpx applies it
+# (HTML5 form encoding: quote, backslash and control characters except ESC)
+_HEADER_PARAM_ESCAPES = {'"': "%22", "\\": "\\\\"}
+_HEADER_PARAM_ESCAPES.update({chr(c): f"%{c:02X}" for c in range(0x20) if c != 0x1B})
+_HEADER_PARAM_PATTERN = re.compile("|".join(re.escape(c) for c in _HEADER_PARAM_ESCAPES))
+
+
+def _quote_header_param(value: str) -> str:
+    """Escape a form field name or filename for a quoted Content-Disposition parameter"""
+    return _HEADER_PARAM_PATTERN.sub(lambda match: _HEADER_PARAM_ESCAPES[match.group(0)], value)
+
+
+def _stream_multipart(
+    data: Dict[str, str],
+    file_field: str,
+    filename: str,
+    audio: Union[bytes, BinaryIO],
+    content_type: str
+) -> Tuple[Dict[str, str], AsyncIterator[bytes]]:
+    """
+    Encode form fields and one file as a streamed multipart/form-data body
+
+    Only the part headers are built up front; a file is read in chunks on the
+    worker pool as httpx sends the body, so the event loop never blocks on
+    disk and the audio is never held in memory as a whole.
+
+    Returns:
+        Tuple of (request_headers, body_iterator)
+    """
+    boundary = secrets.token_hex(16)
+
+    head = bytearray()
+    for name, value in data.items():
+        head += f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote_header_param(name)}"\r\n\r\n{value}\r\n'.encode()
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote_header_param(file_field)}"; filename="{_quote_header_param(filename)}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+
+    if isinstance(audio, bytes):
+        audio_size = len(audio)
+    else:
+        audio_size = os.fstat(audio.fileno()).st_size - audio.tell()
+
+    async def body() -> AsyncIterator[bytes]:
+        yield bytes(head)
+        if isinstance(audio, bytes):
+            yield audio
+        else:
+            while chunk := await run_blocking(audio.read, MULTIPART_CHUNK_SIZE):
+                yield chunk
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + audio_size + len(tail))
+    }
+    return headers, body()
+
 
 class N8NService:
     def __init__(self):
         self.webhook_url = settings.N8N_WEBHOOK_URL
         self.timeout = settings.N8N_TIMEOUT
+        self.client = self._create_client()
+
+    def open(self) -> None:
+        """Recreate the HTTP client if an earlier aclose() shut it down"""
+        if self.client.is_closed:
+            self.client = self._create_client()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Build the client shared by every webhook call"""
+        # One pooled client for every webhook call, so connections to n8n are
+        # kept alive between requests instead of re-handshaking each time.
+        # Over TLS, HTTP/2 multiplexes concurrent calls on one connection;
+        # plain http:// URLs stay on HTTP/1.1.
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30),
+            http2=True
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections to n8n"""
+        await self.client.aclose()
 
     async def process_voice_message(self, user_id: str, transcript: str, audio_filename: Optional[str] = None) -> N8NProcessingResult:
         """Send voice message to n8n workflow for processing"""
@@ -26,36 +116,36 @@ class N8NService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Sending request to n8n webhook: {self.webhook_url}")
-                logger.debug(f"Payload: {payload}")
-
-                response = await client.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-
-                processing_time = time.time() - start_time
+            logger.info("Sending request to n8n webhook: %s", self.webhook_url)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Payload: %s", payload)
+
+            response = await self.client.post(
+                self.webhook_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
 
-                if response.status_code == 200:
-                    result_data = response.json()
-                    logger.info(f"n8n processing completed successfully in {processing_time:.2f}s")
+            processing_time = time.time() - start_time
 
-                    return N8NProcessingResult(
-                        success=True,
-                        result=result_data,
-                        processingTime=processing_time
-                    )
-                else:
-                    error_msg = f"n8n webhook returned status {response.status_code}: {response.text}"
-                    logger.error(error_msg)
+            if response.status_code == 200:
+                result_data = orjson.loads(response.content)
+                logger.info("n8n processing completed successfully in %.2fs", processing_time)
 
-                    return N8NProcessingResult(
-                        success=False,
-                        error=error_msg,
-                        processingTime=processing_time
-                    )
+                return N8NProcessingResult(
+                    success=True,
+                    result=result_data,
+                    processingTime=processing_time
+                )
+            else:
+                error_msg = f"n8n webhook returned status {response.status_code}: {response.text}"
+                logger.error(error_msg)
+
+                return N8NProcessingResult(
+                    success=False,
+                    error=error_msg,
+                    processingTime=processing_time
+                )
 
         except httpx.TimeoutException:
             processing_time = time.time() - start_time
@@ -79,70 +169,66 @@ class N8NService:
                 processingTime=processing_time
             )
 
-    async def process_voice_with_language(self, user_id: str, language: str, voice_record: bytes, filename: str) -> N8NProcessingResult:
-        """Send language and MP3 data to N8N webhook"""
+    async def process_voice_with_language(self, user_id: str, language: str, voice_record: Union[bytes, BinaryIO], filename: str) -> N8NProcessingResult:
+        """Send language and MP3 data to N8N webhook, streaming voice_record if it is a file"""
         start_time = time.time()
 
         try:
             # Create multipart form data with language and voice record
-            files = {
-                "voiceRecord": (filename, voice_record, "audio/webm")
-            }
-
             data = {
                 "language": language,
                 "userId": user_id,
                 "timestamp": str(time.time())
             }
+            headers, body = _stream_multipart(data, "voiceRecord", filename, voice_record, "audio/webm")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Sending language '{language}' and voice data to N8N webhook: {self.webhook_url}")
-                logger.debug(f"User: {user_id}, Language: {language}, Filename: {filename}")
+            logger.info("Sending language '%s' and voice data to N8N webhook: %s", language, self.webhook_url)
+            logger.debug("User: %s, Language: %s, Filename: %s", user_id, language, filename)
 
-                response = await client.post(
-                    self.webhook_url,
-                    files=files,
-                    data=data
-                )
+            response = await self.client.post(
+                self.webhook_url,
+                content=body,
+                headers=headers
+            )
+
+            processing_time = time.time() - start_time
+
+            if response.status_code == 200:
+                result_data = orjson.loads(response.content)
+                logger.info("N8N processing completed successfully in %.2fs", processing_time)
 
-                processing_time = time.time() - start_time
-
-                if response.status_code == 200:
-                    result_data = response.json()
-                    logger.info(f"N8N processing completed successfully in {processing_time:.2f}s")
-
-                    return N8NProcessingResult(
-                        success=True,
-                        result=result_data,
-                        processingTime=processing_time
-                    )
-                elif response.status_code == 404:
-                    # N8N workflow not configured - provide fallback response
-                    logger.warning("N8N workflow not configured (404). Providing fallback response.")
-                    fallback_result = {
-                        "url": "https://example.com/fallback-url",
-                        "language": language,
-                        "userId": user_id,
-                        "timestamp": time.time(),
-                        "success": True,
-                        "fallback": True,
-                        "message": "N8N workflow not configured. Please set up the workflow to process voice messages."
-                    }
-
-                    return N8NProcessingResult(
-                        success=True,
-                        result=fallback_result,
-                        processingTime=processing_time
-                    )
-                else:
-                    error_msg = f"N8N webhook returned status {response.status_code}: {response.text}"
-                    logger.error(error_msg)
-
-                    return N8NProcessingResult(
-                        success=False,
-                        error=error_msg,
-                        processingTime=processing_time
-                    )
+                return N8NProcessingResult(
+                    success=True,
+                    result=result_data,
+                    processingTime=processing_time
+                )
+            elif response.status_code == 404:
+                # N8N workflow not configured - provide fallback response
+                logger.warning("N8N workflow not configured (404). Providing fallback response.")
+                fallback_result = {
+                    "url": "https://example.com/fallback-url",
+                    "language": language,
+                    "userId": user_id,
+                    "timestamp": time.time(),
+                    "success": True,
+                    "fallback": True,
+                    "message": "N8N workflow not configured. Please set up the workflow to process voice messages."
+                }
+
+                return N8NProcessingResult(
+                    success=True,
+                    result=fallback_result,
+                    processingTime=processing_time
+                )
+            else:
+                error_msg = f"N8N webhook returned status {response.status_code}: {response.text}"
+                logger.error(error_msg)
+
+                return N8NProcessingResult(
+                    success=False,
+                    error=error_msg,
+                    processingTime=processing_time
+                )
 
         except httpx.TimeoutException:
             processing_time = time.time() - start_time
@@ -166,68 +252,69 @@ class N8NService:
                 processingTime=processing_time
             )
 
-    async def process_voice_audio(self, user_id: str, audio_content: bytes, audio_filename: str) -> N8NProcessingResult:
-        """Send audio file to N8N workflow for AI processing (voice-to-text and AI response)"""
+    async def process_voice_audio(self, user_id: str, audio_content: Union[bytes, BinaryIO], audio_filename: str) -> N8NProcessingResult:
+        """
+        Send audio file to N8N workflow for AI processing (voice-to-text and AI response)
+
+        audio_content may be an open binary file, in which case it is streamed
+        into the request body in chunks rather than read into memory.
+        """
         start_time = time.time()
 
         try:
             # Create multipart form data for audio file
-            files = {
-                "audio": (audio_filename, audio_content, "audio/webm")
-            }
-
             data = {
                 "userId": user_id,
                 "timestamp": str(time.time())
             }
+            headers, body = _stream_multipart(data, "audio", audio_filename, audio_content, "audio/webm")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.info(f"Sending audio to N8N AI webhook: {self.webhook_url}")
-                logger.debug(f"User: {user_id}, Filename: {audio_filename}")
+            logger.info("Sending audio to N8N AI webhook: %s", self.webhook_url)
+            logger.debug("User: %s, Filename: %s", user_id, audio_filename)
 
-                response = await client.post(
-                    self.webhook_url,
-                    files=files,
-                    data=data
-                )
+            response = await self.client.post(
+                self.webhook_url,
+                content=body,
+                headers=headers
+            )
+
+            processing_time = time.time() - start_time
+
+            if response.status_code == 200:
+                result_data = orjson.loads(response.content)
+                logger.info("N8N AI processing completed successfully in %.2fs", processing_time)
 
-                processing_time = time.time() - start_time
-
-                if response.status_code == 200:
-                    result_data = response.json()
-                    logger.info(f"N8N AI processing completed successfully in {processing_time:.2f}s")
-
-                    return N8NProcessingResult(
-                        success=True,
-                        result=result_data,
-                        processingTime=processing_time
-                    )
-                elif response.status_code == 404:
-                    # N8N workflow not configured - provide fallback response
-                    logger.warning("N8N workflow not configured (404). Providing fallback response.")
-                    fallback_result = {
-                        "transcript": "Voice recorded successfully",
-                        "aiResponse": "Hello! I'm your banking assistant. The N8N workflow is not yet configured. Please set up the workflow in N8N at http://localhost:5678 to enable AI processing with OpenAI.",
-                        "userId": user_id,
-                        "timestamp": time.time(),
-                        "success": True,
-                        "fallback": True
-                    }
-
-                    return N8NProcessingResult(
-                        success=True,
-                        result=fallback_result,
-                        processingTime=processing_time
-                    )
-                else:
-                    error_msg = f"N8N AI webhook returned status {response.status_code}: {response.text}"
-                    logger.error(error_msg)
-
-                    return N8NProcessingResult(
-                        success=False,
-                        error=error_msg,
-                        processingTime=processing_time
-                    )
+                return N8NProcessingResult(
+                    success=True,
+                    result=result_data,
+                    processingTime=processing_time
+                )
+            elif response.status_code == 404:
+                # N8N workflow not configured - provide fallback response
+                logger.warning("N8N workflow not configured (404). Providing fallback response.")
+                fallback_result = {
+                    "transcript": "Voice recorded successfully",
+                    "aiResponse": "Hello! I'm your banking assistant. The N8N workflow is not yet configured. Please set up the workflow in N8N at http://localhost:5678 to enable AI processing with OpenAI.",
+                    "userId": user_id,
+                    "timestamp": time.time(),
+                    "success": True,
+                    "fallback": True
+                }
+
+                return N8NProcessingResult(
+                    success=True,
+                    result=fallback_result,
+                    processingTime=processing_time
+                )
+            else:
+                error_msg = f"N8N AI webhook returned status {response.status_code}: {response.text}"
+                logger.error(error_msg)
+
+                return N8NProcessingResult(
+                    success=False,
+                    error=error_msg,
+                    processingTime=processing_time
+                )
 
         except httpx.TimeoutException:
             processing_time = time.time() - start_time
@@ -0,0 +1,37 @@
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class BufferPool:
+    """
+    Bounded pool of reusable bytearrays
+
+    Buffers are handed out and returned on the event loop thread only, so the
+    pool needs no locking. When every buffer is in use a new one is allocated;
+    on return at most max_buffers are kept.
+    """
+
+    def __init__(self, buffer_size: int, max_buffers: int):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free: List[bytearray] = [bytearray(buffer_size) for _ in range(max_buffers)]
+
+    @contextmanager
+    def buffer(self) -> Iterator[bytearray]:
+        """Borrow a buffer for the duration of the with-block"""
+        buf = self._free.pop() if self._free else bytearray(self.buffer_size)
+        try:
+            yield buf
+        finally:
+            if len(self._free) < self.max_buffers:
+                self._free.append(buf)
+
+
+# Uploads are copied to disk in chunks of this size instead of being read whole
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Global instance for upload copying; one buffer per concurrent upload
+upload_buffers = BufferPool(UPLOAD_CHUNK_SIZE, max_buffers=16)
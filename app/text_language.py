@@ -0,0 +1,46 @@
+from typing import Optional
+
+from langdetect import detect, LangDetectException
+from langdetect.detector_factory import init_factory
+
+# Runs inside process pool workers, which import this module to unpickle the
+# function. Keep it free of app imports so a worker only loads langdetect.
+
+
+def load_language_profiles() -> None:
+    """
+    Load langdetect's language profiles in the current process
+
+    Used as the process pool initializer, so it runs exactly once per worker
+    at start-up instead of during that worker's first detection.
+    """
+    try:
+        init_factory()
+    except Exception:
+        # A failing initializer breaks the pool for every job; let the first
+        # detection load (and report on) the profiles instead
+        pass
+
+
+def detect_language_code(text: str) -> Optional[str]:
+    """
+    Detect the language code of text, returning None when langdetect finds no features
+
+    Exceptions raised in a worker are pickled back to the parent.
+    LangDetectException cannot be unpickled (its __init__ takes two
+    arguments), and trying breaks the whole process pool, so it never leaves
+    the worker. Anything else unexpected is re-raised as a plain RuntimeError
+    for the same reason.
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        ISO 639-1 language code (e.g. "en"), or None
+    """
+    try:
+        return detect(text)
+    except LangDetectException:
+        return None
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
@@ -0,0 +1,452 @@
+import json
+import os
+import tempfile
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+import httpx
+import speech_recognition as sr
+from speech_recognition.recognizers.google import create_request_builder
+
+from .config import settings
+from .audio_convert import convert_audio
+from .ffmpeg_paths import FLAC
+from .workers import run_blocking, run_in_process
+from .cache import audio_cache_key, transcription_cache
+
+logger = logging.getLogger(__name__)
+
+# Containers speech_recognition.AudioFile reads without conversion
+NATIVE_AUDIO_SUFFIXES = frozenset({'.wav', '.flac', '.aif', '.aiff'})
+
+
+# Ensure FLAC is available for speech recognition
+if FLAC:
+    logger.info(f"FLAC utility found at: {FLAC}")
+else:
+    logger.warning("FLAC utility not found in PATH")
+
+
+GOOGLE_SPEECH_URL = "http://www.google.com/speech-api/v2/recognize"
+# Bytes needed to reach the sample rate field in a FLAC STREAMINFO block
+FLAC_HEADER_SIZE = 21
+
+
+class GoogleRecognizer(sr.Recognizer):
+    """
+    Recognizer whose Google Web Speech calls go through a shared, pooled HTTP client
+
+    speech_recognition's own implementation opens a fresh urllib connection
+    (DNS lookup + TCP setup) for every request.
+    """
+
+    def __init__(self, client: httpx.Client):
+        super().__init__()
+        self.client = client
+
+    def recognize_google(self, audio_data, key=None, language="en-US", pfilter=0, show_all=False, with_confidence=False):
+        """Same contract as speech_recognition.Recognizer.recognize_google"""
+        # Audio samples must be at least 8 kHz and 16-bit
+        sample_rate = audio_data.sample_rate if audio_data.sample_rate >= 8000 else 8000
+        flac_data = audio_data.get_flac_data(convert_rate=sample_rate, convert_width=2)
+
+        return self.recognize_flac(flac_data, sample_rate, key, language, pfilter, show_all, with_confidence)
+
+    def recognize_flac(self, flac_data, sample_rate, key=None, language="en-US", pfilter=0, show_all=False, with_confidence=False):
+        """
+        Send already encoded FLAC audio to Google Web Speech; otherwise as recognize_google
+
+        flac_data may be bytes or a binary file object, which is streamed.
+        """
+        # speech_recognition builds the query string and falls back to its own
+        # bundled key when none is configured
+        url = create_request_builder(
+            endpoint=GOOGLE_SPEECH_URL,
+            key=key or settings.GOOGLE_SPEECH_API_KEY,
+            language=language,
+            filter_level=pfilter
+        ).build_url()
+
+        try:
+            response = self.client.post(
+                url,
+                content=flac_data,
+                headers={"Content-Type": f"audio/x-flac; rate={sample_rate}"}
+            )
+        except httpx.HTTPError as e:
+            raise sr.RequestError(f"recognition connection failed: {e}")
+
+        if response.status_code != 200:
+            raise sr.RequestError(f"recognition request failed: {response.reason_phrase}")
+
+        # The response is one JSON object per line; the first non-empty result wins
+        actual_result = []
+        for line in response.text.split("\n"):
+            if not line:
+                continue
+            result = json.loads(line)["result"]
+            if len(result) != 0:
+                actual_result = result[0]
+                break
+
+        if show_all:
+            return actual_result
+
+        if not isinstance(actual_result, dict) or len(actual_result.get("alternative", [])) == 0:
+            raise sr.UnknownValueError()
+
+        alternatives = actual_result["alternative"]
+        best_hypothesis = max(alternatives, key=lambda alternative: alternative.get("confidence", 0))
+        if "transcript" not in best_hypothesis:
+            raise sr.UnknownValueError()
+
+        if with_confidence:
+            return best_hypothesis["transcript"], best_hypothesis.get("confidence", 0.5)
+        return best_hypothesis["transcript"]
+
+
+def flac_sample_rate(flac_data: bytes) -> int:
+    """Read the sample rate from the STREAMINFO block at the start of a FLAC stream"""
+    if flac_data[:4] != b"fLaC" or len(flac_data) < FLAC_HEADER_SIZE:
+        raise ValueError("Not a FLAC stream")
+
+    # 20-bit field after the block header (4 bytes) and block/frame sizes (10 bytes)
+    return (flac_data[18] << 12) | (flac_data[19] << 4) | (flac_data[20] >> 4)
+
+
+class TranscriptionResult(NamedTuple):
+    text: str
+    processed_filename: Optional[str] = None
+    error: Optional[str] = None
+    # ISO 639-1 code when the STT backend identifies the spoken language itself
+    language: Optional[str] = None
+
+
+class TranscriptionService:
+    """Single conversion + speech-to-text pipeline shared by every audio consumer"""
+
+    def __init__(self):
+        self.http_client = self._create_http_client()
+        self.recognizer = GoogleRecognizer(self.http_client)
+        self.backend = settings.STT_BACKEND.lower()
+        self._whisper_model = None
+        self._whisper_lock = threading.Lock()
+        # record() never consults energy_threshold, so calibration is opt-in and done once
+        self._calibrated = settings.SKIP_AMBIENT_CALIBRATION
+        self.temp_dir = Path(settings.TEMP_AUDIO_DIR)
+        self.temp_dir.mkdir(exist_ok=True)
+
+    def warmup(self) -> None:
+        """
+        Prepare the configured backend so the first upload pays no setup cost (blocking)
+
+        Loads the whisper model, or opens a connection to the Google speech
+        endpoint to skip DNS/TCP setup on the first request.
+        """
+        if self.backend == "whisper":
+            self._get_whisper_model()
+            return
+
+        try:
+            self.http_client.head(GOOGLE_SPEECH_URL, timeout=5)
+            logger.info("Speech recognition client warmed up")
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not warm up speech recognition client: {e}")
+
+    def open(self) -> None:
+        """Recreate the HTTP client if an earlier close() shut it down"""
+        if self.http_client.is_closed:
+            self.http_client = self._create_http_client()
+            self.recognizer.client = self.http_client
+
+    def close(self) -> None:
+        """Close pooled connections to the speech endpoint"""
+        self.http_client.close()
+
+    @staticmethod
+    def _create_http_client() -> httpx.Client:
+        """Build the client shared by every STT request"""
+        # One keep-alive connection pool for every STT request; the thread pool
+        # calls into it concurrently, which httpx.Client supports
+        return httpx.Client(
+            timeout=settings.GOOGLE_SPEECH_TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+
+    async def transcribe(self, content: bytes, filename: str) -> TranscriptionResult:
+        """
+        Transcribe raw audio content
+
+        Args:
+            content: Raw audio file content
+            filename: Original filename, used for its extension
+
+        Returns:
+            TranscriptionResult; text is empty and error set when transcription failed
+        """
+        temp_file_path = None
+
+        # Repeated uploads of the same audio skip conversion and STT entirely
+        cache_key = audio_cache_key(content)
+        cached_result = transcription_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"Using cached transcription for {filename}")
+            return cached_result
+
+        try:
+            # Save uploaded file temporarily
+            temp_file_path = await run_blocking(self._save_temp_file, content, filename)
+
+            return await self._transcribe_path(temp_file_path, cache_key)
+
+        finally:
+            # Clean up temporary files
+            await run_blocking(self._cleanup_file, temp_file_path)
+
+    async def transcribe_path(self, audio_path: Path, cache_key: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe an audio file already on disk
+
+        Args:
+            audio_path: Path to the uploaded audio file (left in place)
+            cache_key: Content hash of the audio, used to reuse earlier transcriptions
+
+        Returns:
+            TranscriptionResult; text is empty and error set when transcription failed
+        """
+        if cache_key:
+            cached_result = transcription_cache.get(cache_key)
+            if cached_result is not None:
+                logger.info(f"Using cached transcription for {audio_path.name}")
+                return cached_result
+
+        return await self._transcribe_path(audio_path, cache_key)
+
+    async def _transcribe_path(self, audio_path: Path, cache_key: Optional[str]) -> TranscriptionResult:
+        """Convert and transcribe audio_path without consulting the cache"""
+        if self.backend == "whisper":
+            # Whisper decodes any container itself, no conversion pass needed
+            result = await self._transcribe_whisper(audio_path)
+            if result.text and cache_key:
+                transcription_cache.put(cache_key, result)
+            return result
+
+        processed_file_path = await self._convert_for_recognition(audio_path)
+
+        try:
+            result = await self._transcribe_audio(processed_file_path)
+        finally:
+            # Clean up converted file, the caller owns audio_path
+            if processed_file_path != audio_path:
+                await run_blocking(self._cleanup_file, processed_file_path)
+
+        if result.text and cache_key:
+            transcription_cache.put(cache_key, result)
+
+        return result._replace(processed_filename=processed_file_path.name)
+
+    def _save_temp_file(self, content: bytes, filename: str) -> Path:
+        """Save uploaded content to temporary file"""
+        suffix = Path(filename).suffix or '.tmp'
+
+        with tempfile.NamedTemporaryFile(
+            delete=False,
+            dir=self.temp_dir,
+            suffix=suffix
+        ) as temp_file:
+            temp_file.write(content)
+            return Path(temp_file.name)
+
+    async def _convert_for_recognition(self, input_path: Path) -> Path:
+        """
+        Convert audio file to 16 kHz mono FLAC, the payload Google STT receives
+
+        Encoding straight to FLAC means the upload is never held as PCM/WAV in
+        memory and is about half the size of WAV on the wire.
+        """
+        try:
+            # Formats the recognizer reads directly need no decode/encode pass
+            suffix = input_path.suffix.lower()
+            if settings.SKIP_AUDIO_PREPROCESSING and suffix in NATIVE_AUDIO_SUFFIXES:
+                return input_path
+
+            # Create output path, distinct from the input even for FLAC uploads
+            output_path = input_path.with_name(f"{input_path.stem}.stt.flac")
+
+            # Stream-decode to 16 kHz mono FLAC with ffmpeg
+            await run_in_process(convert_audio, input_path, output_path)
+
+            logger.info(f"Converted {input_path.name} to {output_path.name}")
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Error converting audio file: {e}")
+            # If conversion fails, try to proceed with original file
+            return input_path
+
+    async def _transcribe_audio(self, audio_path: Path) -> TranscriptionResult:
+        """Transcribe audio file to text"""
+        try:
+            text = await run_blocking(self._recognize_file, audio_path)
+
+            logger.info(f"Successfully transcribed audio: {text[:100]}...")
+            return TranscriptionResult(text=text)
+
+        except sr.UnknownValueError:
+            logger.warning("Speech recognition could not understand audio")
+            return TranscriptionResult(
+                text="",
+                error="Could not understand audio clearly. Please try speaking more clearly or checking your microphone."
+            )
+        except sr.RequestError as e:
+            logger.error(f"Could not request results from speech recognition service: {e}")
+            return TranscriptionResult(
+                text="",
+                error="Speech recognition service error. Please check your internet connection."
+            )
+        except FileNotFoundError as e:
+            logger.error(f"Audio file not found: {e}")
+            return TranscriptionResult(text="", error="Audio file processing error. Please try recording again.")
+        except Exception as e:
+            error_msg = str(e)
+            if "FLAC conversion utility not available" in error_msg:
+                logger.error(f"FLAC conversion error: {e}")
+                # Try to convert to FLAC manually using ffmpeg
+                return await self._try_flac_fallback(audio_path)
+            else:
+                logger.error(f"Unexpected error during transcription: {e}")
+                return TranscriptionResult(text="", error=f"Transcription error: {error_msg}")
+
+    async def _try_flac_fallback(self, audio_path: Path) -> TranscriptionResult:
+        """Fallback method when FLAC utility is not available"""
+        flac_path = audio_path.with_suffix('.flac')
+
+        try:
+            # Convert to FLAC using ffmpeg
+            logger.info("Trying FLAC fallback conversion...")
+            await run_in_process(convert_audio, audio_path, flac_path)
+
+            logger.info(f"Converted to FLAC: {flac_path}")
+
+            # Try transcription again with FLAC file
+            text = await run_blocking(self._recognize_file, flac_path)
+
+            logger.info(f"Successfully transcribed using FLAC fallback: {text[:100]}...")
+            return TranscriptionResult(text=text)
+
+        except Exception as fallback_error:
+            logger.error(f"FLAC fallback also failed: {fallback_error}")
+            return TranscriptionResult(
+                text="",
+                error="Audio conversion error. Unable to process audio format. Please try recording in WAV format."
+            )
+        finally:
+            # Clean up FLAC file
+            await run_blocking(self._cleanup_file, flac_path)
+
+    async def _transcribe_whisper(self, audio_path: Path) -> TranscriptionResult:
+        """Transcribe audio file with the local whisper model"""
+        try:
+            result = await run_blocking(self._whisper_transcribe_file, audio_path)
+
+        except Exception as e:
+            logger.error(f"Unexpected error during whisper transcription: {e}")
+            return TranscriptionResult(text="", error=f"Transcription error: {str(e)}")
+
+        if not result.text:
+            logger.warning("Whisper found no speech in audio")
+            return result._replace(
+                error="Could not understand audio clearly. Please try speaking more clearly or checking your microphone."
+            )
+
+        logger.info(f"Successfully transcribed audio ({result.language}): {result.text[:100]}...")
+        return result
+
+    def _get_whisper_model(self):
+        """Load the faster-whisper model once (blocking)"""
+        with self._whisper_lock:
+            if self._whisper_model is None:
+                # Optional dependency, only needed when STT_BACKEND=whisper
+                from faster_whisper import WhisperModel
+
+                self._whisper_model = WhisperModel(
+                    settings.WHISPER_MODEL,
+                    device=settings.WHISPER_DEVICE,
+                    compute_type=settings.WHISPER_COMPUTE_TYPE
+                )
+                logger.info(f"Loaded whisper model '{settings.WHISPER_MODEL}' ({settings.WHISPER_COMPUTE_TYPE})")
+            return self._whisper_model
+
+    def _whisper_transcribe_file(self, audio_path: Path) -> TranscriptionResult:
+        """Run whisper on an audio file in any ffmpeg-readable format (blocking)"""
+        model = self._get_whisper_model()
+        segments, info = model.transcribe(str(audio_path), beam_size=1, vad_filter=True)
+
+        # segments is lazy; decoding happens while joining
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return TranscriptionResult(text=text, language=info.language)
+
+    def _recognize_file(self, audio_path: Path) -> str:
+        """Run Google Speech Recognition on a WAV/AIFF/FLAC file (blocking)"""
+        if audio_path.suffix.lower() == '.flac':
+            # Already in the wire format; stream it from disk in chunks so the
+            # audio is never held in memory as a whole
+            with open(audio_path, "rb") as flac_file:
+                sample_rate = flac_sample_rate(flac_file.read(FLAC_HEADER_SIZE))
+                flac_file.seek(0)
+                return self.recognizer.recognize_flac(flac_file, sample_rate)
+
+        with sr.AudioFile(str(audio_path)) as source:
+            # Calibrate for ambient noise on the first file only; this consumes
+            # the first half second of audio
+            if not self._calibrated:
+                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                self._calibrated = True
+
+            # Record the audio
+            audio = self.recognizer.record(source)
+
+            # Transcribe using Google Speech Recognition
+            return self.recognizer.recognize_google(audio)
+
+    def _cleanup_file(self, file_path: Optional[Path]) -> None:
+        """Remove temporary file"""
+        if file_path and file_path.exists():
+            try:
+                file_path.unlink()
+                logger.debug(f"Cleaned up file: {file_path}")
+            except Exception as e:
+                logger.warning(f"Could not remove file {file_path}: {e}")
+
+    async def cleanup_old_files(self, max_age_hours: int = 24) -> None:
+        """Clean up old temporary files"""
+        removed = await run_blocking(self._remove_old_files, max_age_hours * 3600)
+        if removed:
+            logger.info(f"Removed {removed} stale temporary files")
+
+    def _remove_old_files(self, max_age_seconds: float) -> int:
+        """Delete files in temp_dir older than max_age_seconds in a single directory pass"""
+        current_time = time.time()
+        removed = 0
+
+        # DirEntry caches the file type from readdir, so only the age check
+        # costs a stat call
+        with os.scandir(self.temp_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False) and current_time - entry.stat().st_mtime > max_age_seconds:
+                        os.unlink(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Removed by its own request while we were sweeping
+                    continue
+                except OSError as e:
+                    logger.warning(f"Could not remove file {entry.path}: {e}")
+
+        return removed
+
+
+# Global instance
+transcription_service = TranscriptionService()
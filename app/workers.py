@@ -0,0 +1,76 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .text_language import load_language_profiles
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# The pools are created on startup (or first use) and torn down on shutdown,
+# so an app that runs its lifespan more than once gets fresh pools each time
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_workers() -> None:
+    """Create the shared worker pools if they are not already running"""
+    global _thread_pool, _process_pool
+
+    if _thread_pool is None:
+        # Blocking work here is HTTP calls and disk I/O, so
+        # threads spend most of their time waiting and can outnumber the cores
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 4),
+            thread_name_prefix="audio-worker"
+        )
+
+    if _process_pool is None:
+        # Audio decoding is CPU-bound, so conversions get one process per core. This
+        # also caps how many ffmpeg instances compete for the CPU at once. Workers are
+        # spawned rather than forked because the parent already runs threads.
+        # Each worker loads the langdetect profiles once as it starts.
+        _process_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_language_profiles
+        )
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the shared thread pool without stalling the event loop"""
+    if _thread_pool is None:
+        start_workers()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_thread_pool, functools.partial(func, *args, **kwargs))
+
+
+async def run_in_process(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a CPU-bound callable on the shared process pool
+
+    func and its arguments must be picklable, i.e. module-level functions
+    taking plain values.
+    """
+    if _process_pool is None:
+        start_workers()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_process_pool, func, *args)
+
+
+def shutdown_workers() -> None:
+    """Stop the shared worker pools, waiting for in-flight jobs to finish"""
+    global _thread_pool, _process_pool
+
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True)
+        _process_pool = None
+    logger.info("Worker pools shut down")
@@ -0,0 +1,16 @@
+// One-off migration: convert voice action timestamps stored as BSON dates to
+// epoch nanoseconds (the format written by the app since timestamps became ints).
+// The app reads both formats, so this can run any time after deploying; rows
+// stay sorted correctly only once it has run. The old code cannot read the
+// converted rows, so roll back only after reversing it.
+//
+//   docker exec -i banking_voice_mongodb mongosh -u admin -p password123 \
+//     --authenticationDatabase admin < migrate-timestamps.js
+db = db.getSiblingDB('banking_voice_app');
+
+const result = db.voice_actions.updateMany(
+    { "timestamp": { "$type": "date" } },
+    [{ "$set": { "timestamp": { "$multiply": [{ "$toLong": "$timestamp" }, NumberLong(1000000)] } } }]
+);
+
+print(`Converted ${result.modifiedCount} voice action timestamps to epoch nanoseconds`);
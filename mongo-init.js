@@ -4,9 +4,7 @@ db = db.getSiblingDB('banking_voice_app');
 // Create the voice_actions collection
 db.createCollection('voice_actions');
 
-// Create indexes for better performance
-db.voice_actions.createIndex({ "userId": 1 });
-db.voice_actions.createIndex({ "timestamp": 1 });
+// Per-user history is queried newest first; the compound index covers filter and sort
 db.voice_actions.createIndex({ "userId": 1, "timestamp": -1 });
 
 // Insert a sample document (optional)
@@ -15,7 +13,7 @@ db.voice_actions.insertOne({
     "audioTranscript": "Sample banking request for testing",
     "audioFileName": "sample.wav",
     "processed": false,
-    "timestamp": new Date()
+    "timestamp": NumberLong(String(Date.now()) + "000000")  // epoch nanoseconds
 });
 
 print("Banking Voice App database initialized successfully!");
\ No newline at end of file